@@ -7,6 +7,7 @@ from aidial_adapter_bedrock.deployments import (
     EmbeddingsDeployment,
 )
 from aidial_adapter_bedrock.dial_api.response import ModelObject, ModelsResponse
+from aidial_adapter_bedrock.dial_api.storage import close_client_session
 from aidial_adapter_bedrock.embeddings import BedrockEmbeddings
 from aidial_adapter_bedrock.server.exceptions import dial_exception_decorator
 from aidial_adapter_bedrock.utils.env import get_aws_default_region
@@ -25,6 +26,8 @@ app = DIALApp(
 # logging=True configuration.
 configure_loggers()
 
+app.add_event_handler("shutdown", close_client_session)
+
 
 @app.get("/openai/models")
 @dial_exception_decorator
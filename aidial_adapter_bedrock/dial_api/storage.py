@@ -1,28 +1,92 @@
-import base64
 import hashlib
-import io
 import mimetypes
 import os
-from typing import Mapping, Optional, TypedDict
+from functools import lru_cache
+from typing import Mapping, Optional, Tuple
 from urllib.parse import urljoin
 
 import aiohttp
+import msgspec
+import pybase64
+from blake3 import blake3
 
+from aidial_adapter_bedrock.utils.concurrency import make_async
 from aidial_adapter_bedrock.utils.log_config import bedrock_logger as log
 
 
-class FileMetadata(TypedDict):
+class FileMetadata(msgspec.Struct):
     name: str
-    parentPath: str
     bucket: str
     url: str
+    parentPath: Optional[str] = None
 
 
-class Bucket(TypedDict):
+class Bucket(msgspec.Struct):
     bucket: str
     appdata: str
 
 
+# SHA-256 produces the same file names as the earlier versions of the adapter
+FILE_STORAGE_HASH_ALGORITHM = os.getenv(
+    "FILE_STORAGE_HASH_ALGORITHM", "blake3"
+).lower()
+if FILE_STORAGE_HASH_ALGORITHM not in ("blake3", "sha256"):
+    raise ValueError(
+        f"Unsupported FILE_STORAGE_HASH_ALGORITHM: {FILE_STORAGE_HASH_ALGORITHM!r}"
+    )
+
+# Inputs larger than this are hashed by BLAKE3 using multiple threads
+_BLAKE3_MULTITHREADING_THRESHOLD = 1024 * 1024
+
+# Decoding and hashing of larger payloads is moved off the event loop
+_OFFLOAD_THRESHOLD = 64 * 1024
+
+# Extensions of the image types generated by the adapter,
+# which don't require the initialization of the mimetypes database
+_IMAGE_EXTENSIONS: Mapping[str, str] = {
+    "image/png": ".png",
+    "image/jpeg": ".jpg",
+    "image/gif": ".gif",
+    "image/webp": ".webp",
+}
+
+
+@lru_cache(maxsize=64)
+def _guess_extension(content_type: str) -> str:
+    ext = _IMAGE_EXTENSIONS.get(content_type)
+    if ext is not None:
+        return ext
+    return mimetypes.guess_extension(content_type) or ""
+
+
+_client_session: Optional[aiohttp.ClientSession] = None
+
+
+def _get_client_session() -> aiohttp.ClientSession:
+    """
+    The session is shared by all the requests to DIAL and other file hosts,
+    so that the connections are kept alive between the requests.
+    Cookies are never stored, because the requests are made
+    on behalf of different users.
+    """
+    global _client_session
+    if _client_session is None or _client_session.closed:
+        _client_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=100, limit_per_host=20, keepalive_timeout=30
+            ),
+            cookie_jar=aiohttp.DummyCookieJar(),
+        )
+    return _client_session
+
+
+async def close_client_session() -> None:
+    global _client_session
+    if _client_session is not None:
+        await _client_session.close()
+        _client_session = None
+
+
 class FileStorage:
     dial_url: str
     api_key: str
@@ -33,18 +97,27 @@ class FileStorage:
         self.api_key = api_key
         self.bucket = None
 
+        self._v1_root = f"{dial_url}/v1/"
+        self._dial_url_lower = dial_url.lower()
+
+    def _is_dial_url(self, url: str) -> bool:
+        prefix = url[: len(self._dial_url_lower)]
+        return prefix.lower() == self._dial_url_lower
+
     @property
     def auth_headers(self) -> Mapping[str, str]:
         return {"api-key": self.api_key}
 
-    async def _get_bucket(self, session: aiohttp.ClientSession) -> Bucket:
+    async def _get_bucket(self) -> Bucket:
         if self.bucket is None:
-            async with session.get(
-                f"{self.dial_url}/v1/bucket",
+            async with _get_client_session().get(
+                f"{self._v1_root}bucket",
                 headers=self.auth_headers,
             ) as response:
                 response.raise_for_status()
-                self.bucket = await response.json()
+                self.bucket = msgspec.json.decode(
+                    await response.read(), type=Bucket
+                )
                 log.debug(f"bucket: {self.bucket}")
 
         return self.bucket
@@ -56,7 +129,7 @@ class FileStorage:
         data = aiohttp.FormData()
         data.add_field(
             "file",
-            io.BytesIO(content),
+            content,
             filename=filename,
             content_type=content_type,
         )
@@ -65,59 +138,84 @@ class FileStorage:
     async def upload(
         self, filename: str, content_type: str, content: bytes
     ) -> FileMetadata:
-        async with aiohttp.ClientSession() as session:
-            bucket = await self._get_bucket(session)
+        bucket = await self._get_bucket()
 
-            appdata = bucket["appdata"]
-            ext = mimetypes.guess_extension(content_type) or ""
-            url = f"{self.dial_url}/v1/files/{appdata}/{filename}{ext}"
+        appdata = bucket.appdata
+        ext = _guess_extension(content_type)
+        url = f"{self._v1_root}files/{appdata}/{filename}{ext}"
 
-            data = FileStorage._to_form_data(filename, content_type, content)
+        data = FileStorage._to_form_data(filename, content_type, content)
 
-            async with session.put(
-                url=url,
-                data=data,
-                headers=self.auth_headers,
-            ) as response:
-                response.raise_for_status()
-                meta = await response.json()
-                log.debug(f"Uploaded file: url={url}, metadata={meta}")
-                return meta
+        async with _get_client_session().put(
+            url=url,
+            data=data,
+            headers=self.auth_headers,
+        ) as response:
+            response.raise_for_status()
+            meta = msgspec.json.decode(await response.read(), type=FileMetadata)
+            log.debug(f"Uploaded file: url={url}, metadata={meta}")
+            return meta
 
     async def upload_file_as_base64(
         self, upload_dir: str, data: str, content_type: str
     ) -> FileMetadata:
-        filename = f"{upload_dir}/{_compute_hash_digest(data)}"
-        content: bytes = base64.b64decode(data)
+        if len(data) > _OFFLOAD_THRESHOLD:
+            content, digest = await make_async(lambda: _decode_and_hash(data))
+        else:
+            content, digest = _decode_and_hash(data)
+
+        filename = f"{upload_dir}/{digest}"
         return await self.upload(filename, content_type, content)
 
-    async def download_file_as_base64(self, dial_path: str) -> str:
-        url = urljoin(f"{self.dial_url}/v1/", dial_path)
+    async def download_file(self, dial_path: str) -> bytes:
+        url = urljoin(self._v1_root, dial_path)
         headers: Mapping[str, str] = {}
-        if url.lower().startswith(self.dial_url.lower()):
+        if self._is_dial_url(url):
             headers = self.auth_headers
 
-        return await download_file_as_base64(url, headers)
+        return await download_file(url, headers)
+
+    async def download_file_as_base64(self, dial_path: str) -> str:
+        data = await self.download_file(dial_path)
+        return pybase64.b64encode_as_string(data)
 
 
-async def _download_file(
-    url: str, headers: Optional[Mapping[str, str]]
+async def download_file(
+    url: str, headers: Optional[Mapping[str, str]] = None
 ) -> bytes:
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, headers=headers) as response:
-            response.raise_for_status()
-            return await response.read()
+    async with _get_client_session().get(url, headers=headers) as response:
+        response.raise_for_status()
+        return await response.read()
 
 
 async def download_file_as_base64(
     url: str, headers: Optional[Mapping[str, str]] = None
 ) -> str:
-    data = await _download_file(url, headers)
-    return base64.b64encode(data).decode("ascii")
+    data = await download_file(url, headers)
+    return pybase64.b64encode_as_string(data)
+
+
+def _decode_and_hash(data: str) -> Tuple[bytes, str]:
+    content = pybase64.b64decode(data, validate=False)
+
+    # The legacy file names are digests of the base64 encoded content
+    hashed = (
+        data.encode() if FILE_STORAGE_HASH_ALGORITHM == "sha256" else content
+    )
+
+    return content, _compute_hash_digest(hashed)
+
 
+def _compute_hash_digest(file_content: bytes) -> str:
+    if FILE_STORAGE_HASH_ALGORITHM == "sha256":
+        return hashlib.sha256(file_content).hexdigest()
 
-def _compute_hash_digest(file_content: str) -> str:
-    return hashlib.sha256(file_content.encode()).hexdigest()
+    max_threads = (
+        blake3.AUTO
+        if len(file_content) > _BLAKE3_MULTITHREADING_THRESHOLD
+        else 1
+    )
+    return blake3(file_content, max_threads=max_threads).hexdigest()
 
 
 DIAL_URL = os.getenv("DIAL_URL")
@@ -1,4 +1,5 @@
-from typing import List, Optional, Union
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Union
 
 from aidial_sdk.chat_completion import (
     CustomContent,
@@ -7,19 +8,20 @@ from aidial_sdk.chat_completion import (
     Role,
     ToolCall,
 )
-from pydantic import BaseModel
 
 from aidial_adapter_bedrock.llm.errors import ValidationError
 
 
-class SystemMessage(BaseModel):
+@dataclass(slots=True)
+class SystemMessage:
     content: str
 
     def to_message(self) -> Message:
         return Message(role=Role.SYSTEM, content=self.content)
 
 
-class HumanRegularMessage(BaseModel):
+@dataclass(slots=True)
+class HumanRegularMessage:
     content: str
     custom_content: Optional[CustomContent] = None
 
@@ -31,7 +33,8 @@ class HumanRegularMessage(BaseModel):
         )
 
 
-class HumanToolResultMessage(BaseModel):
+@dataclass(slots=True)
+class HumanToolResultMessage:
     id: str
     content: str
 
@@ -43,7 +46,8 @@ class HumanToolResultMessage(BaseModel):
         )
 
 
-class HumanFunctionResultMessage(BaseModel):
+@dataclass(slots=True)
+class HumanFunctionResultMessage:
     name: str
     content: str
 
@@ -55,7 +59,8 @@ class HumanFunctionResultMessage(BaseModel):
         )
 
 
-class AIRegularMessage(BaseModel):
+@dataclass(slots=True)
+class AIRegularMessage:
     content: str
     custom_content: Optional[CustomContent] = None
 
@@ -67,7 +72,8 @@ class AIRegularMessage(BaseModel):
         )
 
 
-class AIToolCallMessage(BaseModel):
+@dataclass(slots=True)
+class AIToolCallMessage:
     calls: List[ToolCall]
     content: Optional[str] = None
 
@@ -79,7 +85,8 @@ class AIToolCallMessage(BaseModel):
         )
 
 
-class AIFunctionCallMessage(BaseModel):
+@dataclass(slots=True)
+class AIFunctionCallMessage:
     call: FunctionCall
     content: Optional[str] = None
 
@@ -107,45 +114,67 @@ def _parse_assistant_message(
     tool_calls: Optional[List[ToolCall]],
     custom_content: Optional[CustomContent],
 ) -> BaseMessage | ToolMessage:
-    if content is not None and function_call is None and tool_calls is None:
-        return AIRegularMessage(content=content, custom_content=custom_content)
-
-    if function_call is not None and tool_calls is None:
+    if function_call is None:
+        if tool_calls is None:
+            if content is not None:
+                return AIRegularMessage(
+                    content=content, custom_content=custom_content
+                )
+        else:
+            return AIToolCallMessage(calls=tool_calls, content=content)
+    elif tool_calls is None:
         return AIFunctionCallMessage(call=function_call, content=content)
 
-    if function_call is None and tool_calls is not None:
-        return AIToolCallMessage(calls=tool_calls, content=content)
-
     raise ValidationError("Unknown type of assistant message")
 
 
+def _invalid_message() -> ValidationError:
+    return ValidationError("Unknown message type or invalid message")
+
+
+def _parse_system_message(msg: Message) -> BaseMessage | ToolMessage:
+    if msg.content is None:
+        raise _invalid_message()
+    return SystemMessage(content=msg.content)
+
+
+def _parse_user_message(msg: Message) -> BaseMessage | ToolMessage:
+    if msg.content is None:
+        raise _invalid_message()
+    return HumanRegularMessage(
+        content=msg.content, custom_content=msg.custom_content
+    )
+
+
+def _parse_ai_message(msg: Message) -> BaseMessage | ToolMessage:
+    return _parse_assistant_message(
+        msg.content, msg.function_call, msg.tool_calls, msg.custom_content
+    )
+
+
+def _parse_function_message(msg: Message) -> BaseMessage | ToolMessage:
+    if msg.content is None or msg.name is None:
+        raise _invalid_message()
+    return HumanFunctionResultMessage(name=msg.name, content=msg.content)
+
+
+def _parse_tool_message(msg: Message) -> BaseMessage | ToolMessage:
+    if msg.content is None or msg.tool_call_id is None:
+        raise _invalid_message()
+    return HumanToolResultMessage(id=msg.tool_call_id, content=msg.content)
+
+
+_ROLE_PARSERS: Dict[Role, Callable[[Message], BaseMessage | ToolMessage]] = {
+    Role.SYSTEM: _parse_system_message,
+    Role.USER: _parse_user_message,
+    Role.ASSISTANT: _parse_ai_message,
+    Role.FUNCTION: _parse_function_message,
+    Role.TOOL: _parse_tool_message,
+}
+
+
 def parse_dial_message(msg: Message) -> BaseMessage | ToolMessage:
-    match msg:
-        case Message(role=Role.SYSTEM, content=content) if content is not None:
-            return SystemMessage(content=content)
-        case Message(
-            role=Role.USER, content=content, custom_content=custom_content
-        ) if content is not None:
-            return HumanRegularMessage(
-                content=content, custom_content=custom_content
-            )
-        case Message(
-            role=Role.ASSISTANT,
-            content=content,
-            function_call=function_call,
-            tool_calls=tool_calls,
-            custom_content=custom_content,
-        ):
-            return _parse_assistant_message(
-                content, function_call, tool_calls, custom_content
-            )
-        case Message(
-            role=Role.FUNCTION, name=name, content=content
-        ) if content is not None and name is not None:
-            return HumanFunctionResultMessage(name=name, content=content)
-        case Message(
-            role=Role.TOOL, tool_call_id=id, content=content
-        ) if content is not None and id is not None:
-            return HumanToolResultMessage(id=id, content=content)
-        case _:
-            raise ValidationError("Unknown message type or invalid message")
+    parser = _ROLE_PARSERS.get(msg.role)
+    if parser is None:
+        raise _invalid_message()
+    return parser(msg)
@@ -1,7 +1,23 @@
 import json
 import mimetypes
-from typing import List, Literal, Optional, Set, Tuple, assert_never, cast
+import os
+from functools import lru_cache
+from typing import (
+    Any,
+    Callable,
+    Coroutine,
+    Dict,
+    FrozenSet,
+    List,
+    Literal,
+    Optional,
+    Sequence,
+    Tuple,
+    assert_never,
+    cast,
+)
 
+import pybase64
 from aidial_sdk.chat_completion import (
     Attachment,
     FinishReason,
@@ -18,10 +34,7 @@ from anthropic.types import (
 )
 from anthropic.types.image_block_param import Source
 
-from aidial_adapter_bedrock.dial_api.storage import (
-    FileStorage,
-    download_file_as_base64,
-)
+from aidial_adapter_bedrock.dial_api.storage import FileStorage, download_file
 from aidial_adapter_bedrock.llm.errors import UserError, ValidationError
 from aidial_adapter_bedrock.llm.message import (
     AIRegularMessage,
@@ -32,30 +45,70 @@ from aidial_adapter_bedrock.llm.message import (
     SystemMessage,
 )
 from aidial_adapter_bedrock.llm.tools.tools_config import ToolsMode
+from aidial_adapter_bedrock.utils.concurrency import gather_or_cancel
 
 ClaudeFinishReason = Literal[
     "end_turn", "max_tokens", "stop_sequence", "tool_use"
 ]
 ImageMediaType = Literal["image/png", "image/jpeg", "image/gif", "image/webp"]
-IMAGE_MEDIA_TYPES: Set[ImageMediaType] = {
-    "image/png",
-    "image/jpeg",
-    "image/gif",
-    "image/webp",
-}
+IMAGE_MEDIA_TYPES: FrozenSet[ImageMediaType] = frozenset(
+    {
+        "image/png",
+        "image/jpeg",
+        "image/gif",
+        "image/webp",
+    }
+)
+
+FILE_EXTENSIONS = ("png", "jpeg", "jpg", "gif", "webp")
+
+
+def get_usage_message(supported_exts: Sequence[str]) -> str:
+    return f"""
+The application answers queries about attached images.
+Attach images and ask questions about them in the same message.
+
+Supported image types: {', '.join(supported_exts)}.
+
+Examples of queries:
+- "Describe this picture" for one image,
+- "What are in these images? Is there any difference between them?" for multiple images.
+""".strip()
 
-FILE_EXTENSIONS = ["png", "jpeg", "jpg", "gif", "webp"]
+
+_USAGE_MESSAGE = get_usage_message(FILE_EXTENSIONS)
 
 
 def _validate_media_type(media_type: str) -> ImageMediaType:
     if media_type not in IMAGE_MEDIA_TYPES:
         raise UserError(
             f"Unsupported media type: {media_type}",
-            get_usage_message(FILE_EXTENSIONS),
+            _USAGE_MESSAGE,
         )
     return cast(ImageMediaType, media_type)
 
 
+_IMAGE_MEDIA_TYPES_BY_EXTENSION: Dict[str, ImageMediaType] = {
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".gif": "image/gif",
+    ".webp": "image/webp",
+}
+
+
+@lru_cache(maxsize=64)
+def _guess_type_by_extension(ext: str) -> Optional[str]:
+    media_type = _IMAGE_MEDIA_TYPES_BY_EXTENSION.get(ext)
+    if media_type is not None:
+        return media_type
+    return mimetypes.guess_type(f"file{ext}")[0]
+
+
+def _guess_type(url: str) -> Optional[str]:
+    return _guess_type_by_extension(os.path.splitext(url)[1].lower())
+
+
 def _create_image_block(
     media_type: ImageMediaType, data: str
 ) -> ImageBlockParam:
@@ -69,11 +122,11 @@ def _create_image_block(
     )
 
 
-async def _download_data(url: str, file_storage: Optional[FileStorage]) -> str:
+async def _download_raw(url: str, file_storage: Optional[FileStorage]) -> bytes:
     if not file_storage:
-        return await download_file_as_base64(url)
+        return await download_file(url)
 
-    return await file_storage.download_file_as_base64(url)
+    return await file_storage.download_file(url)
 
 
 async def _to_claude_image(
@@ -89,14 +142,17 @@ async def _to_claude_image(
         )
 
     if attachment.url:
-        media_type = attachment.type or mimetypes.guess_type(attachment.url)[0]
+        media_type = attachment.type or _guess_type(attachment.url)
         if not media_type:
             raise ValidationError(
                 f"Cannot guess attachment type for {attachment.url}"
             )
 
-        data = await _download_data(attachment.url, file_storage)
-        return _create_image_block(_validate_media_type(media_type), data)
+        image_media_type = _validate_media_type(media_type)
+        raw = await _download_raw(attachment.url, file_storage)
+        return _create_image_block(
+            image_media_type, pybase64.b64encode_as_string(raw)
+        )
 
     raise ValidationError("Attachment data or URL is required")
 
@@ -105,14 +161,17 @@ async def _to_claude_message(
     message: AIRegularMessage | HumanRegularMessage,
     file_storage: Optional[FileStorage],
 ) -> List[TextBlockParam | ImageBlockParam]:
-    content: List[TextBlockParam | ImageBlockParam] = []
+    attachments = (
+        (message.custom_content.attachments or [])
+        if message.custom_content
+        else []
+    )
 
-    if message.custom_content:
-        for attachment in message.custom_content.attachments or []:
-            content.append(await _to_claude_image(attachment, file_storage))
+    images = await gather_or_cancel(
+        _to_claude_image(attachment, file_storage) for attachment in attachments
+    )
 
-    content.append(TextBlockParam(text=message.content, type="text"))
-    return content
+    return [*images, TextBlockParam(text=message.content, type="text")]
 
 
 def _to_claude_tool_call(call: ToolCall) -> ToolUseBlockParam:
@@ -134,6 +193,70 @@ def _to_claude_tool_result(
     )
 
 
+async def _to_claude_human_message(
+    message: HumanRegularMessage, file_storage: Optional[FileStorage]
+) -> MessageParam:
+    return MessageParam(
+        role="user",
+        content=await _to_claude_message(message, file_storage),
+    )
+
+
+async def _to_claude_ai_message(
+    message: AIRegularMessage, file_storage: Optional[FileStorage]
+) -> MessageParam:
+    return MessageParam(
+        role="assistant",
+        content=await _to_claude_message(message, file_storage),
+    )
+
+
+async def _to_claude_ai_tool_call_message(
+    message: AIToolCallMessage, file_storage: Optional[FileStorage]
+) -> MessageParam:
+    content: List[TextBlockParam | ToolUseBlockParam] = [
+        _to_claude_tool_call(call) for call in message.calls
+    ]
+    if message.content is not None:
+        content.insert(0, TextBlockParam(text=message.content, type="text"))
+
+    return MessageParam(role="assistant", content=content)
+
+
+async def _to_claude_human_tool_result_message(
+    message: HumanToolResultMessage, file_storage: Optional[FileStorage]
+) -> MessageParam:
+    return MessageParam(
+        role="user",
+        content=[_to_claude_tool_result(message)],
+    )
+
+
+_MessageConverter = Callable[
+    [Any, Optional[FileStorage]], Coroutine[Any, Any, MessageParam]
+]
+
+_MESSAGE_CONVERTERS: Dict[type, _MessageConverter] = {
+    HumanRegularMessage: _to_claude_human_message,
+    AIRegularMessage: _to_claude_ai_message,
+    AIToolCallMessage: _to_claude_ai_tool_call_message,
+    HumanToolResultMessage: _to_claude_human_tool_result_message,
+}
+
+
+def _get_message_converter(
+    message: BaseMessage | HumanToolResultMessage | AIToolCallMessage,
+) -> _MessageConverter:
+    converter = _MESSAGE_CONVERTERS.get(type(message))
+    if converter is None:
+        if isinstance(message, SystemMessage):
+            raise ValidationError(
+                "System message is only allowed as the first message"
+            )
+        raise ValueError(f"Unknown message type {type(message)}")
+    return converter
+
+
 async def to_claude_messages(
     messages: List[BaseMessage | HumanToolResultMessage | AIToolCallMessage],
     file_storage: Optional[FileStorage],
@@ -146,51 +269,16 @@ async def to_claude_messages(
         system_prompt = messages[0].content
         messages = messages[1:]
 
-    claude_messages: List[MessageParam] = []
-    for message in messages:
-        match message:
-            case HumanRegularMessage():
-                claude_messages.append(
-                    MessageParam(
-                        role="user",
-                        content=await _to_claude_message(message, file_storage),
-                    )
-                )
-            case AIRegularMessage():
-                claude_messages.append(
-                    MessageParam(
-                        role="assistant",
-                        content=await _to_claude_message(message, file_storage),
-                    )
-                )
-            case AIToolCallMessage():
-                content: List[TextBlockParam | ToolUseBlockParam] = [
-                    _to_claude_tool_call(call) for call in message.calls
-                ]
-                if message.content is not None:
-                    content.insert(
-                        0, TextBlockParam(text=message.content, type="text")
-                    )
+    # Resolving the converters first to validate the messages
+    # before any attachment is downloaded
+    converters = [_get_message_converter(message) for message in messages]
 
-                claude_messages.append(
-                    MessageParam(
-                        role="assistant",
-                        content=content,
-                    )
-                )
-            case HumanToolResultMessage():
-                claude_messages.append(
-                    MessageParam(
-                        role="user",
-                        content=[_to_claude_tool_result(message)],
-                    )
-                )
-            case SystemMessage():
-                raise ValidationError(
-                    "System message is only allowed as the first message"
-                )
-            case _:
-                assert_never(message)
+    # The messages are converted concurrently, so that the attachments
+    # of the whole conversation are downloaded at the same time
+    claude_messages: List[MessageParam] = await gather_or_cancel(
+        converter(message, file_storage)
+        for converter, message in zip(converters, messages)
+    )
 
     return system_prompt, claude_messages
 
@@ -233,16 +321,3 @@ def to_claude_tool_config(function_call: Function) -> ToolParam:
         name=function_call.name,
         description=function_call.description or "",
     )
-
-
-def get_usage_message(supported_exts: List[str]) -> str:
-    return f"""
-The application answers queries about attached images.
-Attach images and ask questions about them in the same message.
-
-Supported image types: {', '.join(supported_exts)}.
-
-Examples of queries:
-- "Describe this picture" for one image,
-- "What are in these images? Is there any difference between them?" for multiple images.
-""".strip()
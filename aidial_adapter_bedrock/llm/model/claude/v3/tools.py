@@ -1,4 +1,3 @@
-import json
 from typing import assert_never
 
 from aidial_sdk.chat_completion import FunctionCall, ToolCall
@@ -16,10 +15,11 @@ from aidial_adapter_bedrock.llm.message import (
     ToolMessage,
 )
 from aidial_adapter_bedrock.llm.tools.tools_config import ToolsMode
+from aidial_adapter_bedrock.utils.json import dumps_str
 
 
 def to_dial_function_call(block: ToolUseBlock) -> FunctionCall:
-    return FunctionCall(name=block.name, arguments=json.dumps(block.input))
+    return FunctionCall(name=block.name, arguments=dumps_str(block.input))
 
 
 def to_dial_tool_call(block: ToolUseBlock) -> ToolCall:
@@ -93,7 +93,7 @@ async def save_to_storage(
         return Attachment(
             title=attachment.title,
             type=attachment.type,
-            url=response["url"],
+            url=response.url,
         )
 
     return attachment
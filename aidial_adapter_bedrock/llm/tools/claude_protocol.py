@@ -9,6 +9,7 @@ from aidial_adapter_bedrock.llm.message import (
     AIToolCallMessage,
 )
 from aidial_adapter_bedrock.llm.tools.tools_config import ToolsConfig, ToolsMode
+from aidial_adapter_bedrock.utils.json import dumps_str
 from aidial_adapter_bedrock.utils.pydantic import ExtraForbidModel
 from aidial_adapter_bedrock.utils.xml import parse_xml, tag, tag_nl
 
@@ -159,7 +160,7 @@ def _parse_function_call(text: str) -> FunctionCall:
     except Exception:
         raise Exception("Unable to parse function call")
 
-    return FunctionCall(name=tool_name, arguments=json.dumps(parameters))
+    return FunctionCall(name=tool_name, arguments=dumps_str(parameters))
 
 
 def parse_call(
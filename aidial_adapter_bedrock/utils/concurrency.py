@@ -1,9 +1,13 @@
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
 from typing import (
+    Any,
     AsyncIterator,
     Callable,
+    Coroutine,
+    Iterable,
     Iterator,
+    List,
     Optional,
     Tuple,
     TypeVar,
@@ -32,3 +36,18 @@ async def to_async_iterator(iter: Iterator[T]) -> AsyncIterator[T]:
             break
         else:
             yield cast(T, item)
+
+
+async def gather_or_cancel(coros: Iterable[Coroutine[Any, Any, T]]) -> List[T]:
+    """
+    Runs the coroutines concurrently and returns their results in order.
+    Unlike asyncio.gather, cancels the remaining coroutines
+    as soon as one of them fails, and re-raises the first error as is.
+    """
+    try:
+        async with asyncio.TaskGroup() as tg:
+            tasks = [tg.create_task(coro) for coro in coros]
+    except BaseExceptionGroup as e:
+        raise e.exceptions[0]
+
+    return [task.result() for task in tasks]
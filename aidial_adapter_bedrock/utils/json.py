@@ -2,6 +2,8 @@
 Utilities for pretty-printing JSON in debug logs.
 These functions are useful for dumping large data structures,
 with options to trim long strings and lists to specified limits.
+
+Also fast JSON serialization for the response hot paths.
 """
 
 import json
@@ -9,9 +11,32 @@ from dataclasses import asdict, is_dataclass
 from enum import Enum
 from typing import Any
 
+import orjson
 from pydantic import BaseModel
 
 
+def dumps_str(obj: Any) -> str:
+    """
+    orjson rejects integers beyond the 64-bit range and turns NaN and Infinity
+    into null, so the objects holding them are serialized by the stdlib json.
+    """
+    try:
+        data = orjson.dumps(obj)
+    except orjson.JSONEncodeError:
+        return _json_dumps_compact(obj)
+
+    # NaN and Infinity may hide behind a null. Walking the object to tell
+    # them from the real nulls costs more than the stdlib serialization.
+    if b"null" in data:
+        return _json_dumps_compact(obj)
+
+    return data.decode()
+
+
+def _json_dumps_compact(obj: Any) -> str:
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+
 def remove_nones(d: dict) -> dict:
     return {k: v for k, v in d.items() if v is not None}
 
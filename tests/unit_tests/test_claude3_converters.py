@@ -0,0 +1,244 @@
+import asyncio
+import math
+
+import pytest
+from aidial_sdk.chat_completion import (
+    Attachment,
+    CustomContent,
+    FunctionCall,
+    ToolCall,
+)
+
+from aidial_adapter_bedrock.llm.errors import ValidationError
+from aidial_adapter_bedrock.llm.message import (
+    AIToolCallMessage,
+    HumanRegularMessage,
+    HumanToolResultMessage,
+)
+from aidial_adapter_bedrock.llm.model.claude.v3 import converters
+from aidial_adapter_bedrock.llm.model.claude.v3.converters import (
+    to_claude_messages,
+)
+from tests.utils.messages import ai, sys, user
+
+
+def _image_block(media_type: str, data: str) -> dict:
+    return {
+        "type": "image",
+        "source": {"type": "base64", "media_type": media_type, "data": data},
+    }
+
+
+def _text_block(text: str) -> dict:
+    return {"type": "text", "text": text}
+
+
+def _user_with_images(*urls: str) -> HumanRegularMessage:
+    attachments = [Attachment(type="image/png", url=url) for url in urls]
+    return HumanRegularMessage(
+        content="question",
+        custom_content=CustomContent(attachments=attachments),
+    )
+
+
+@pytest.mark.asyncio
+async def test_empty_messages():
+    assert await to_claude_messages([], None) == (None, [])
+
+
+@pytest.mark.asyncio
+async def test_messages_conversion():
+    tool_call = ToolCall(
+        id="call_1",
+        type="function",
+        function=FunctionCall(name="f", arguments='{"a": 1}'),
+    )
+
+    system_prompt, messages = await to_claude_messages(
+        [
+            sys("system"),
+            user("question"),
+            AIToolCallMessage(calls=[tool_call], content="thinking"),
+            HumanToolResultMessage(id="call_1", content="result"),
+            ai("answer"),
+        ],
+        None,
+    )
+
+    assert system_prompt == "system"
+    assert messages == [
+        {"role": "user", "content": [_text_block("question")]},
+        {
+            "role": "assistant",
+            "content": [
+                _text_block("thinking"),
+                {
+                    "type": "tool_use",
+                    "id": "call_1",
+                    "name": "f",
+                    "input": {"a": 1},
+                },
+            ],
+        },
+        {
+            "role": "user",
+            "content": [
+                {
+                    "type": "tool_result",
+                    "tool_use_id": "call_1",
+                    "content": [_text_block("result")],
+                }
+            ],
+        },
+        {"role": "assistant", "content": [_text_block("answer")]},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_attachments_order():
+    attachments = [
+        Attachment(type="image/png", data="cG5n"),
+        Attachment(type="image/jpeg", data="anBlZw=="),
+        Attachment(type="image/gif", data="Z2lm"),
+    ]
+    message = HumanRegularMessage(
+        content="question",
+        custom_content=CustomContent(attachments=attachments),
+    )
+
+    _, messages = await to_claude_messages([message], None)
+
+    assert messages == [
+        {
+            "role": "user",
+            "content": [
+                _image_block("image/png", "cG5n"),
+                _image_block("image/jpeg", "anBlZw=="),
+                _image_block("image/gif", "Z2lm"),
+                _text_block("question"),
+            ],
+        }
+    ]
+
+
+@pytest.mark.asyncio
+async def test_system_message_in_the_middle():
+    with pytest.raises(ValidationError):
+        await to_claude_messages([user("question"), sys("system")], None)
+
+
+@pytest.mark.asyncio
+async def test_attachments_are_downloaded_concurrently(monkeypatch):
+    in_flight = 0
+    max_in_flight = 0
+
+    async def download_raw(url: str, file_storage) -> bytes:
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return url.encode()
+
+    monkeypatch.setattr(converters, "_download_raw", download_raw)
+
+    _, messages = await to_claude_messages(
+        [
+            _user_with_images("1.png", "2.png"),
+            ai("answer"),
+            _user_with_images("3.png"),
+        ],
+        None,
+    )
+
+    assert max_in_flight == 3
+    assert [message["content"] for message in messages] == [
+        [
+            _image_block("image/png", "MS5wbmc="),
+            _image_block("image/png", "Mi5wbmc="),
+            _text_block("question"),
+        ],
+        [_text_block("answer")],
+        [_image_block("image/png", "My5wbmc="), _text_block("question")],
+    ]
+
+
+@pytest.mark.asyncio
+async def test_downloads_are_cancelled_on_error(monkeypatch):
+    cancelled = []
+
+    async def download_raw(url: str, file_storage) -> bytes:
+        if url == "missing.png":
+            raise ValueError("Not found")
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(url)
+            raise
+        return url.encode()
+
+    monkeypatch.setattr(converters, "_download_raw", download_raw)
+
+    with pytest.raises(ValueError, match="Not found"):
+        await asyncio.wait_for(
+            to_claude_messages(
+                [
+                    _user_with_images("1.png", "missing.png"),
+                    ai("answer"),
+                    _user_with_images("2.png"),
+                ],
+                None,
+            ),
+            timeout=5,
+        )
+
+    assert sorted(cancelled) == ["1.png", "2.png"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "arguments, expected",
+    [
+        (
+            '{"a": 123456789012345678901234567890}',
+            123456789012345678901234567890,
+        ),
+        (
+            '{"a": -123456789012345678901234567890}',
+            -123456789012345678901234567890,
+        ),
+        ('{"a": 18446744073709551615}', 18446744073709551615),
+        ('{"a": -9223372036854775809}', -9223372036854775809),
+        ('{"a": 1.5e30}', 1.5e30),
+    ],
+)
+async def test_tool_call_arguments_are_parsed_exactly(arguments: str, expected):
+    tool_call = ToolCall(
+        id="call_1",
+        type="function",
+        function=FunctionCall(name="f", arguments=arguments),
+    )
+
+    _, messages = await to_claude_messages(
+        [user("question"), AIToolCallMessage(calls=[tool_call])], None
+    )
+
+    [tool_use] = messages[1]["content"]
+    assert tool_use["input"]["a"] == expected  # type: ignore
+    assert type(tool_use["input"]["a"]) is type(expected)  # type: ignore
+
+
+@pytest.mark.asyncio
+async def test_tool_call_arguments_with_nan():
+    tool_call = ToolCall(
+        id="call_1",
+        type="function",
+        function=FunctionCall(name="f", arguments='{"a": NaN}'),
+    )
+
+    _, messages = await to_claude_messages(
+        [user("question"), AIToolCallMessage(calls=[tool_call])], None
+    )
+
+    [tool_use] = messages[1]["content"]
+    assert math.isnan(tool_use["input"]["a"])  # type: ignore
@@ -0,0 +1,47 @@
+import math
+from typing import Any
+
+import pytest
+from anthropic.types import ToolUseBlock
+
+from aidial_adapter_bedrock.llm.model.claude.v3.tools import (
+    to_dial_function_call,
+)
+from aidial_adapter_bedrock.utils.json import dumps_str
+
+
+def test_dumps_str():
+    assert dumps_str({"a": [1, "ü"]}) == '{"a":[1,"ü"]}'
+
+
+@pytest.mark.parametrize(
+    "obj, expected",
+    [
+        ({"a": None}, '{"a":null}'),
+        (
+            {"a": [123456789012345678901234567890]},
+            '{"a":[123456789012345678901234567890]}',
+        ),
+        ({"a": -(2**63) - 1, "b": "ü"}, '{"a":-9223372036854775809,"b":"ü"}'),
+        ({"a": [None, math.nan]}, '{"a":[null,NaN]}'),
+        ({"a": (math.inf, -math.inf)}, '{"a":[Infinity,-Infinity]}'),
+    ],
+)
+def test_dumps_str_special_numbers(obj: Any, expected: str):
+    assert dumps_str(obj) == expected
+
+
+@pytest.mark.parametrize(
+    "input, expected",
+    [
+        ({"a": 1}, '{"a":1}'),
+        (
+            {"a": 123456789012345678901234567890},
+            '{"a":123456789012345678901234567890}',
+        ),
+        ({"a": math.nan}, '{"a":NaN}'),
+    ],
+)
+def test_to_dial_function_call(input: dict, expected: str):
+    block = ToolUseBlock(id="call_1", input=input, name="f", type="tool_use")
+    assert to_dial_function_call(block).arguments == expected
@@ -0,0 +1,63 @@
+import pytest
+from aidial_sdk.chat_completion import FunctionCall, Message, Role, ToolCall
+
+from aidial_adapter_bedrock.llm.errors import ValidationError
+from aidial_adapter_bedrock.llm.message import (
+    AIFunctionCallMessage,
+    AIRegularMessage,
+    AIToolCallMessage,
+    HumanFunctionResultMessage,
+    HumanRegularMessage,
+    HumanToolResultMessage,
+    SystemMessage,
+    parse_dial_message,
+)
+
+_FUNCTION_CALL = FunctionCall(name="f", arguments="{}")
+_TOOL_CALL = ToolCall(id="1", type="function", function=_FUNCTION_CALL)
+
+valid_messages = [
+    (Message(role=Role.SYSTEM, content="s"), SystemMessage(content="s")),
+    (Message(role=Role.USER, content="u"), HumanRegularMessage(content="u")),
+    (Message(role=Role.ASSISTANT, content="a"), AIRegularMessage(content="a")),
+    (
+        Message(role=Role.ASSISTANT, function_call=_FUNCTION_CALL),
+        AIFunctionCallMessage(call=_FUNCTION_CALL),
+    ),
+    (
+        Message(role=Role.ASSISTANT, content="a", tool_calls=[_TOOL_CALL]),
+        AIToolCallMessage(calls=[_TOOL_CALL], content="a"),
+    ),
+    (
+        Message(role=Role.FUNCTION, name="f", content="r"),
+        HumanFunctionResultMessage(name="f", content="r"),
+    ),
+    (
+        Message(role=Role.TOOL, tool_call_id="1", content="r"),
+        HumanToolResultMessage(id="1", content="r"),
+    ),
+]
+
+invalid_messages = [
+    Message(role=Role.SYSTEM),
+    Message(role=Role.USER),
+    Message(role=Role.ASSISTANT),
+    Message(
+        role=Role.ASSISTANT,
+        function_call=_FUNCTION_CALL,
+        tool_calls=[_TOOL_CALL],
+    ),
+    Message(role=Role.FUNCTION, content="r"),
+    Message(role=Role.TOOL, content="r"),
+]
+
+
+@pytest.mark.parametrize("message, expected", valid_messages)
+def test_parse_valid_message(message: Message, expected):
+    assert parse_dial_message(message) == expected
+
+
+@pytest.mark.parametrize("message", invalid_messages)
+def test_parse_invalid_message(message: Message):
+    with pytest.raises(ValidationError):
+        parse_dial_message(message)
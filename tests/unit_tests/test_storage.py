@@ -0,0 +1,246 @@
+import base64
+import hashlib
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Tuple
+
+import pytest
+from aiohttp import web
+from blake3 import blake3
+
+from aidial_adapter_bedrock.dial_api import storage
+from aidial_adapter_bedrock.dial_api.storage import (
+    Bucket,
+    FileMetadata,
+    FileStorage,
+    _compute_hash_digest,
+    _get_client_session,
+    _guess_extension,
+    close_client_session,
+    download_file_as_base64,
+)
+
+payloads = [b"", b"hello", b"A" * (2 * 1024 * 1024)]
+
+
+@pytest.mark.parametrize("payload", payloads)
+def test_hash_digest_blake3(payload: bytes):
+    expected = blake3(payload).hexdigest()
+    assert _compute_hash_digest(payload) == expected
+
+
+@pytest.mark.parametrize("payload", payloads)
+def test_hash_digest_sha256(monkeypatch, payload: bytes):
+    monkeypatch.setattr(storage, "FILE_STORAGE_HASH_ALGORITHM", "sha256")
+
+    expected = hashlib.sha256(payload).hexdigest()
+    assert _compute_hash_digest(payload) == expected
+
+
+@pytest.mark.parametrize(
+    "content_type, ext",
+    [
+        ("image/png", ".png"),
+        ("image/jpeg", ".jpg"),
+        ("image/gif", ".gif"),
+        ("image/webp", ".webp"),
+        ("application/pdf", ".pdf"),
+        ("unknown/type", ""),
+    ],
+)
+def test_guess_extension(content_type: str, ext: str):
+    assert _guess_extension(content_type) == ext
+
+
+async def _upload_base64(monkeypatch, data: str) -> Tuple[str, str, bytes]:
+    uploaded = []
+
+    async def upload(self, filename: str, content_type: str, content: bytes):
+        uploaded.append((filename, content_type, content))
+
+    monkeypatch.setattr(FileStorage, "upload", upload)
+
+    file_storage = FileStorage(dial_url="http://dial", api_key="key")
+    await file_storage.upload_file_as_base64("images", data, "image/png")
+
+    assert len(uploaded) == 1
+    return uploaded[0]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("content", [b"image content", b"A" * 1024 * 1024])
+async def test_upload_file_as_base64_hashes_content(
+    monkeypatch, content: bytes
+):
+    data = base64.b64encode(content).decode()
+
+    filename, content_type, uploaded_content = await _upload_base64(
+        monkeypatch, data
+    )
+
+    assert filename == f"images/{blake3(content).hexdigest()}"
+    assert content_type == "image/png"
+    assert uploaded_content == content
+
+
+@pytest.mark.asyncio
+async def test_upload_file_as_base64_legacy_file_name(monkeypatch):
+    monkeypatch.setattr(storage, "FILE_STORAGE_HASH_ALGORITHM", "sha256")
+
+    data = base64.b64encode(b"image content").decode()
+
+    filename, _, _ = await _upload_base64(monkeypatch, data)
+
+    assert filename == f"images/{hashlib.sha256(data.encode()).hexdigest()}"
+
+
+def test_form_data():
+    content = b"image content"
+    form_data = FileStorage._to_form_data("images/file", "image/png", content)
+
+    writer = form_data()
+    assert writer.headers["Content-Type"].startswith(
+        "multipart/form-data; boundary="
+    )
+
+    [(part, _, _)] = writer._parts
+    assert part.headers["Content-Type"] == "image/png"
+    assert (
+        part.headers["Content-Disposition"]
+        == 'form-data; name="file"; filename="images%2Ffile"'
+    )
+    assert part.size == len(content)
+
+
+@asynccontextmanager
+async def _serve(
+    app: web.Application, host: str = "127.0.0.1"
+) -> AsyncIterator[str]:
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]  # type: ignore
+
+    try:
+        yield f"http://{host}:{port}"
+    finally:
+        await close_client_session()
+        await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_download_reuses_client_session():
+    content = b"image content"
+
+    async def handler(_request: web.Request) -> web.Response:
+        return web.Response(body=content)
+
+    app = web.Application()
+    app.router.add_get("/image.png", handler)
+
+    async with _serve(app) as base_url:
+        url = f"{base_url}/image.png"
+        expected = base64.b64encode(content).decode()
+
+        assert await download_file_as_base64(url) == expected
+        session = _get_client_session()
+        assert await download_file_as_base64(url) == expected
+        assert _get_client_session() is session
+
+    assert session.closed
+
+
+@pytest.mark.asyncio
+async def test_upload():
+    content = b"image content"
+    uploaded = {}
+
+    async def get_bucket(_request: web.Request) -> web.Response:
+        return web.json_response({"bucket": "bucket", "appdata": "appdata"})
+
+    async def put_file(request: web.Request) -> web.Response:
+        form = await request.post()
+        uploaded["content"] = form["file"].file.read()  # type: ignore
+        path = request.match_info["path"]
+        return web.json_response(
+            {
+                "name": path.split("/")[-1],
+                "parentPath": "appdata/images",
+                "bucket": "bucket",
+                "url": f"files/{path}",
+                "contentLength": len(content),
+            }
+        )
+
+    app = web.Application()
+    app.router.add_get("/v1/bucket", get_bucket)
+    app.router.add_put("/v1/files/{path:.*}", put_file)
+
+    async with _serve(app) as base_url:
+        file_storage = FileStorage(dial_url=base_url, api_key="key")
+        metadata = await file_storage.upload_file_as_base64(
+            "images", base64.b64encode(content).decode(), "image/png"
+        )
+
+    digest = blake3(content).hexdigest()
+    assert metadata == FileMetadata(
+        name=f"{digest}.png",
+        parentPath="appdata/images",
+        bucket="bucket",
+        url=f"files/appdata/images/{digest}.png",
+    )
+    assert file_storage.bucket == Bucket(bucket="bucket", appdata="appdata")
+    assert uploaded["content"] == content
+
+
+@pytest.mark.asyncio
+async def test_download_auth_headers():
+    api_keys = []
+
+    async def handler(request: web.Request) -> web.Response:
+        api_keys.append(request.headers.get("api-key"))
+        return web.Response(body=b"content")
+
+    app = web.Application()
+    app.router.add_get("/v1/files/{path:.*}", handler)
+
+    async with _serve(app) as base_url:
+        dial_url = base_url.replace("http://", "HTTP://")
+        file_storage = FileStorage(dial_url=dial_url, api_key="key")
+
+        await file_storage.download_file("files/bucket/image.png")
+        await file_storage.download_file(f"{base_url}/v1/files/image.png")
+
+        other_url = base_url.replace("127.0.0.1", "localhost")
+        await file_storage.download_file(f"{other_url}/v1/files/image.png")
+
+    assert api_keys == ["key", "key", None]
+
+
+@pytest.mark.asyncio
+async def test_cookies_are_not_shared_between_users():
+    requests = []
+
+    async def handler(request: web.Request) -> web.Response:
+        api_key = request.headers.get("api-key")
+        requests.append((api_key, request.headers.get("Cookie")))
+        response = web.Response(body=b"content")
+        response.set_cookie("session", str(api_key))
+        return response
+
+    app = web.Application()
+    app.router.add_get("/v1/files/{path:.*}", handler)
+
+    # The default cookie jar ignores cookies from IP addresses
+    async with _serve(app, host="localhost") as base_url:
+        for api_key in ["user-A-key", "user-B-key"]:
+            file_storage = FileStorage(dial_url=base_url, api_key=api_key)
+            await file_storage.download_file("files/bucket/image.png")
+
+        await storage.download_file(f"{base_url}/v1/files/image.png")
+
+    assert requests == [
+        ("user-A-key", None),
+        ("user-B-key", None),
+        (None, None),
+    ]
@@ -12,7 +12,7 @@ from aidial_adapter_bedrock.llm.truncate_prompt import (
     TruncatePromptError,
     compute_discarded_messages,
 )
-from tests.utils.messages import ai, sys, user
+from tests.utils.messages import ai, sys, user, words_tokenizer
 
 
 async def truncate_prompt_by_words(
@@ -20,12 +20,9 @@ async def truncate_prompt_by_words(
     user_limit: int,
     model_limit: Optional[int] = None,
 ) -> DiscardedMessages | TruncatePromptError:
-    async def _tokenize_by_words(messages: List[BaseMessage]) -> int:
-        return sum(len(msg.content.split()) for msg in messages)
-
     return await compute_discarded_messages(
         messages=messages,
-        tokenizer=_tokenize_by_words,
+        tokenizer=words_tokenizer(messages),
         keep_message=keep_last_and_system_messages,
         partitioner=trivial_partitioner,
         model_limit=model_limit,
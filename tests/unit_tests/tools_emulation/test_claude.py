@@ -63,7 +63,8 @@ FUNCTION_CALL = FunctionCall(
             "arg_name1": "arg_value1",
             "arg_name2": "arg_value2",
             "arg_name3": "arg_value3",
-        }
+        },
+        separators=(",", ":"),
     ),
 )
 
@@ -159,3 +160,25 @@ def test_parse_xml():
             }
         }
     }
+
+
+def test_print_function_call_with_special_numbers():
+    call = FunctionCall(
+        name="name",
+        arguments='{"big": 123456789012345678901234567890, "nan": NaN}',
+    )
+
+    assert (
+        print_function_call(call)
+        == """
+<function_calls>
+<invoke>
+<tool_name>name</tool_name>
+<parameters>
+<big>123456789012345678901234567890</big>
+<nan>nan</nan>
+</parameters>
+</invoke>
+</function_calls>
+""".strip()
+    )
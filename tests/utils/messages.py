@@ -1,4 +1,4 @@
-from typing import List
+from typing import Awaitable, Callable, Dict, List
 
 from aidial_sdk.chat_completion import Attachment, CustomContent, Message
 
@@ -32,3 +32,25 @@ def user_with_image(content: str, image_base64: str) -> HumanRegularMessage:
 
 def to_sdk_messages(messages: List[BaseMessage | ToolMessage]) -> List[Message]:
     return [msg.to_message() for msg in messages]
+
+
+def words_tokenizer(
+    messages: List[BaseMessage],
+) -> Callable[[List[BaseMessage]], Awaitable[int]]:
+    """
+    Tokenizer which counts words in the messages.
+    The counts are computed once for the given messages,
+    since the tokenizer is called many times on their subsets.
+    """
+    counts: Dict[int, int] = {
+        id(msg): len(msg.content.split()) for msg in messages
+    }
+
+    def _count(msg: BaseMessage) -> int:
+        count = counts.get(id(msg))
+        return len(msg.content.split()) if count is None else count
+
+    async def _tokenize(messages: List[BaseMessage]) -> int:
+        return sum(_count(msg) for msg in messages)
+
+    return _tokenize